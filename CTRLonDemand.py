@@ -1,9 +1,21 @@
+import functools
+import json
+import os
+import re
+
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 ORIGO = "Origo"
-CURRENT_COLOR_INDEX = [6]
-CURRENT_COLOR_RGB_CREATE = [0.0, 0.0, 1.0]
-CURRENT_COLOR_RGB_ADJUST = [0.0, 0.0, 1.0]
+CURRENT_COLOR = {
+    "create": {"index": 6, "rgb": [0.0, 0.0, 1.0]},
+    "adjust": {"index": 6, "rgb": [0.0, 0.0, 1.0]},
+}
 # -----------------------------------------------------------------------------------------------------------------#
 #                                         ~ Controller Shape Definitions ~                                       #
 # -----------------------------------------------------------------------------------------------------------------#
@@ -63,12 +75,131 @@ SHAPE_CREATORS = {
     "Box": create_box_controller,
 }
 
-COLOR_PRESETS = {
-    "Blue": (6, [0.0, 0.0, 1.0]),
-    "Red": (13, [1.0, 0.0, 0.0]),
-    "Yellow": (17, [1.0, 1.0, 0.0]),
+TRANSFORM_ATTRS = ["translateX", "translateY", "translateZ",
+                   "rotateX", "rotateY", "rotateZ",
+                   "scaleX", "scaleY", "scaleZ", "visibility"]
+
+SIDE_TOKENS = {
+    "L": "L", "LF": "L", "LEFT": "L",
+    "R": "R", "RT": "R", "RIGHT": "R",
+    "C": "C", "CN": "C", "CTR": "C", "CENTER": "C", "M": "C", "MID": "C",
 }
 
+# -----------------------------------------------------------------------------------------------------------------#
+#                                            ~ Color Palettes ~                                                    #
+# -----------------------------------------------------------------------------------------------------------------#
+# Maya's default drawing override colors, index 0 is "use default" and never picked by the lookup
+MAYA_INDEX_COLORS = [
+    None,
+    (0.0, 0.0, 0.0), (0.251, 0.251, 0.251), (0.6, 0.6, 0.6), (0.608, 0.0, 0.157),
+    (0.0, 0.016, 0.376), (0.0, 0.0, 1.0), (0.0, 0.275, 0.098), (0.149, 0.0, 0.263),
+    (0.784, 0.0, 0.784), (0.541, 0.282, 0.2), (0.247, 0.137, 0.122), (0.6, 0.149, 0.0),
+    (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.255, 0.6), (1.0, 1.0, 1.0),
+    (1.0, 1.0, 0.0), (0.392, 0.863, 1.0), (0.263, 1.0, 0.639), (1.0, 0.69, 0.69),
+    (0.894, 0.675, 0.475), (1.0, 1.0, 0.388), (0.0, 0.6, 0.329), (0.631, 0.416, 0.188),
+    (0.624, 0.631, 0.188), (0.408, 0.631, 0.188), (0.188, 0.631, 0.365), (0.188, 0.631, 0.631),
+    (0.188, 0.404, 0.631), (0.435, 0.188, 0.631), (0.631, 0.188, 0.416),
+]
+
+COLOR_LUT_STEPS = 8
+
+def color_distance(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+def build_color_index_lut(index_colors, steps=COLOR_LUT_STEPS):
+    # For every cell of a steps^3 RGB grid keep the few indices that can be nearest to some color inside it:
+    # any index whose closest point in the cell beats the best farthest-corner distance of all indices
+    colors = [(i, rgb) for i, rgb in enumerate(index_colors) if rgb is not None]
+    size = 1.0 / steps
+    lut = []
+    for r in range(steps):
+        for g in range(steps):
+            for b in range(steps):
+                low = (r * size, g * size, b * size)
+                high = (low[0] + size, low[1] + size, low[2] + size)
+                closest = [color_distance(rgb, [min(max(c, lo), hi) for c, lo, hi in zip(rgb, low, high)])
+                           for _, rgb in colors]
+                farthest = [color_distance(rgb, [lo if c - lo > hi - c else hi for c, lo, hi in zip(rgb, low, high)])
+                            for _, rgb in colors]
+                limit = min(farthest)
+                lut.append([colors[n] for n, distance in enumerate(closest) if distance <= limit])
+    return lut
+
+COLOR_INDEX_LUT = build_color_index_lut(MAYA_INDEX_COLORS)
+
+def nearest_color_index(rgb):
+    r, g, b = [min(COLOR_LUT_STEPS - 1, max(0, int(c * COLOR_LUT_STEPS))) for c in rgb]
+    candidates = COLOR_INDEX_LUT[(r * COLOR_LUT_STEPS + g) * COLOR_LUT_STEPS + b]
+    return min(candidates, key=lambda candidate: color_distance(candidate[1], rgb))[0]
+
+PALETTES = {
+    "Default": {
+        "colors": {
+            "Blue": [0.0, 0.0, 1.0],
+            "Red": [1.0, 0.0, 0.0],
+            "Yellow": [1.0, 1.0, 0.0],
+        },
+        "sides": {"L": "Blue", "R": "Red", "C": "Yellow"},
+    },
+}
+
+ACTIVE_PALETTE = ["Default"]
+
+# Resolved colors of the active palette, label: (index, rgb), and side: label
+COLOR_PRESETS = {}
+SIDE_COLORS = {}
+
+def compile_palette(palette):
+    colors = {}
+    for label, value in palette["colors"].items():
+        if isinstance(value, dict):
+            rgb = [float(c) for c in value["rgb"]]
+            index = value.get("index", nearest_color_index(rgb))
+        else:
+            rgb = [float(c) for c in value]
+            index = nearest_color_index(rgb)
+        colors[label] = (index, rgb)
+
+    sides = dict(palette.get("sides", {}))
+    for side, label in sides.items():
+        if label not in colors:
+            raise ValueError("Side '%s' uses unknown palette color '%s'" % (side, label))
+    return colors, sides
+
+def set_active_palette(name):
+    if name not in PALETTES:
+        cmds.warning("Palette '%s' does not exist." % name)
+        return False
+
+    colors, sides = compile_palette(PALETTES[name])
+    COLOR_PRESETS.clear()
+    COLOR_PRESETS.update(colors)
+    SIDE_COLORS.clear()
+    SIDE_COLORS.update(sides)
+    ACTIVE_PALETTE[0] = name
+    return True
+
+def load_palette(path, activate=True):
+    with open(path) as f:
+        data = json.load(f)
+
+    name = data.get("name") or os.path.splitext(os.path.basename(path))[0]
+    palette = {"colors": data["colors"], "sides": data.get("sides", {})}
+    compile_palette(palette)  # validate before registering
+    PALETTES[name] = palette
+
+    if activate:
+        set_active_palette(name)
+    return name
+
+def side_color(name):
+    side = get_side(name)
+    if side not in SIDE_COLORS:
+        return None
+    return COLOR_PRESETS[SIDE_COLORS[side]]
+
+set_active_palette("Default")
+
 # -----------------------------------------------------------------------------------------------------------------#
 #                                         ~ Core Controller Creation ~                                             #
 # -----------------------------------------------------------------------------------------------------------------#
@@ -84,6 +215,8 @@ def match_pivot(source, target):
 
 def color_controller(ctrl, color_index=None, rgb=None):
     shapes = cmds.listRelatives(ctrl, s=True, f=True) or []
+    if rgb and color_index is None:
+        color_index = nearest_color_index(rgb)
     for shape in shapes:
         if cmds.objectType(shape) == "nurbsCurve":
             cmds.setAttr(shape + ".overrideEnabled", 1)
@@ -94,11 +227,14 @@ def color_controller(ctrl, color_index=None, rgb=None):
                 cmds.setAttr(shape + ".overrideColorR", rgb[0])
                 cmds.setAttr(shape + ".overrideColorG", rgb[1])
                 cmds.setAttr(shape + ".overrideColorB", rgb[2])
+                # Indexed fallback for tools that ignore RGB overrides
+                if color_index is not None:
+                    cmds.setAttr(shape + ".overrideColor", color_index)
             elif color_index is not None:
                 cmds.setAttr(shape + ".overrideRGBColors", 0)
                 cmds.setAttr(shape + ".overrideColor", color_index)
 
-def create_custom_controller(name, size, shape_type, rgb=None, include_offset=True):
+def create_custom_controller(name, size, shape_type, rgb=None, include_offset=True, color_index=None):
     find_origo()
     offset_group = [None]
     ctrl_name = "%s" % (name)
@@ -115,7 +251,7 @@ def create_custom_controller(name, size, shape_type, rgb=None, include_offset=Tr
     matchTransform(curve, ORIGO)
     cmds.makeIdentity(curve, apply=True, t=1, r=1, s=1, n=0)
 
-    color_controller(curve, CURRENT_COLOR_INDEX[0], rgb=rgb)
+    color_controller(curve, color_index, rgb=rgb)
 
     if include_offset:
         offset_group = cmds.group(empty=True, name=ctrl_name + "_offset")
@@ -141,20 +277,1050 @@ def safe_set_attr(node, attrs, lock, keyable, channelBox, value=None):
         if keyable:
             cmds.setAttr(full_attr, keyable=keyable)
 
+def get_side(name):
+    short_name = name.split("|")[-1].split(":")[-1]
+    for token in short_name.split("_"):
+        side = SIDE_TOKENS.get(token.upper())
+        if side:
+            return side
+    return None
 
 # -----------------------------------------------------------------------------------------------------------------#
-#                                           ~ UI Callbacks ~                                                       #
+#                                         ~ Controller Operations ~                                                #
 # -----------------------------------------------------------------------------------------------------------------#
-def select_preset_color(label, tab="create"):
+LOCK_MODES = {
+    # mode: (lock, keyable, channelBox)
+    "Lock": (True, False, True),
+    "LockHide": (True, False, False),
+    "Unlock": (False, True, True),
+}
+
+def undoable(func):
+    # Runs the whole operation as one undo step
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cmds.undoInfo(openChunk=True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+    return wrapper
+
+def has_curve_shape(node):
+    shapes = cmds.listRelatives(node, shapes=True, f=True) or []
+    return any(cmds.objectType(s) == "nurbsCurve" for s in shapes)
+
+def find_controllers(nodes):
+    controllers = []
+    for obj in nodes:
+        # Direct controller with shape?
+        if cmds.objectType(obj) == "transform" and has_curve_shape(obj):
+            controllers.append(obj)
+
+        # Offset group? Look inside for child with shape
+        for child in cmds.listRelatives(obj, children=True, fullPath=True) or []:
+            if has_curve_shape(child):
+                controllers.append(child)
+    return controllers
+
+def lock_channels(nodes, attrs, mode):
+    lock, keyable, channelBox = LOCK_MODES[mode]
+    for obj in nodes:
+        safe_set_attr(node=obj, attrs=attrs, lock=lock, keyable=keyable, channelBox=channelBox)
+    return nodes
+
+def set_rotate_order(controllers, order_label):
+    rotation_order = ROTATION_ORDER.get(order_label, 0)
+    updated = []
+    for ctrl in controllers:
+        try:
+            cmds.setAttr(ctrl + ".rotateOrder", rotation_order)
+            updated.append(ctrl)
+        except Exception as e:
+            cmds.warning("Failed to set rotate order on %s: %s" % (ctrl, str(e)))
+    return updated
+
+def match_transform_axes(source, target, translate=(True, True, True), rotate=(True, True, True)):
+    if any(translate):
+        t_values = cmds.xform(target, q=True, ws=True, t=True)
+        if not all(translate):
+            s_values = cmds.xform(source, q=True, ws=True, t=True)
+            t_values = [t if a else s for t, s, a in zip(t_values, s_values, translate)]
+        cmds.xform(source, ws=True, t=t_values)
+
+    if any(rotate):
+        r_values = cmds.xform(target, q=True, ws=True, ro=True)
+        if not all(rotate):
+            s_values = cmds.xform(source, q=True, ws=True, ro=True)
+            r_values = [r if a else s for r, s, a in zip(r_values, s_values, rotate)]
+        cmds.xform(source, ws=True, ro=r_values)
+
+def change_color(controllers, color_index=None, rgb=None):
+    for ctrl in controllers:
+        color_controller(ctrl, color_index=color_index, rgb=rgb)
+    return controllers
+
+def recolor_by_side(controllers):
+    # Group first so every side resolves its palette color once
+    by_side = {}
+    for ctrl in controllers:
+        by_side.setdefault(get_side(ctrl), []).append(ctrl)
+
+    recolored = []
+    for side, nodes in by_side.items():
+        if side not in SIDE_COLORS:
+            continue
+        color_index, rgb = COLOR_PRESETS[SIDE_COLORS[side]]
+        recolored.extend(change_color(nodes, color_index=color_index, rgb=rgb))
+    return recolored
+
+# (shape_type, size): curve data centered on the controller pivot, shared by every swap at that size
+SHAPE_DATA_CACHE = {}
+
+SHAPE_DISPLAY_ATTRS = ["overrideEnabled", "overrideRGBColors", "overrideColor",
+                       "overrideColorR", "overrideColorG", "overrideColorB", "lineWidth"]
+
+def get_dag_path(node):
+    selection = om.MSelectionList()
+    selection.add(node)
+    return selection.getDagPath(0)
+
+def curve_shapes(ctrl):
+    shapes = cmds.listRelatives(ctrl, shapes=True, fullPath=True, noIntermediate=True) or []
+    return [s for s in shapes if cmds.objectType(s) == "nurbsCurve"]
+
+def points_extent(points):
+    if not points:
+        return 0.0
+    return max(max(p[axis] for p in points) - min(p[axis] for p in points) for axis in range(3))
+
+def get_shape_data(shape_type, size):
+    key = (shape_type, size)
+    if key in SHAPE_DATA_CACHE:
+        return SHAPE_DATA_CACHE[key]
+
+    # Same pivot handling as create_custom_controller, baked into the points instead of the transform
+    curve = SHAPE_CREATORS[shape_type]("CTRLonDemand_shapeTemplate", size)
+    cmds.xform(curve, cp=True)
+    if shape_type == "Pyramid":
+        cmds.move(0, 6.496254 * size, 0, curve + ".scalePivot", curve + ".rotatePivot", r=True)
+    pivot = cmds.xform(curve, q=True, ws=True, rp=True)
+
+    data = []
+    for shape in curve_shapes(curve):
+        curve_fn = om.MFnNurbsCurve(get_dag_path(shape))
+        data.append({
+            "points": [(p.x - pivot[0], p.y - pivot[1], p.z - pivot[2])
+                       for p in curve_fn.cvPositions(om.MSpace.kObject)],
+            "knots": list(curve_fn.knots()),
+            "degree": curve_fn.degree,
+            "periodic": curve_fn.form == om.MFnNurbsCurve.kPeriodic,
+        })
+    cmds.delete(curve)
+
+    SHAPE_DATA_CACHE[key] = data
+    return data
+
+def controller_size(ctrl, shape_type):
+    points = []
+    for shape in curve_shapes(ctrl):
+        points.extend((p.x, p.y, p.z) for p in om.MFnNurbsCurve(get_dag_path(shape)).cvPositions(om.MSpace.kObject))
+
+    unit_extent = points_extent([p for data in get_shape_data(shape_type, 1.0) for p in data["points"]])
+    if not points or not unit_extent:
+        return 1.0
+    # Rounded so controllers of the same size share one cache entry
+    return round(points_extent(points) / unit_extent, 3)
+
+def incoming_connections(shape):
+    # (attribute, source plug) pairs, leaving out the construction history feeding the curve itself
+    pairs = cmds.listConnections(shape, source=True, destination=False, plugs=True, connections=True) or []
+    connections = []
+    for destination, source in zip(pairs[0::2], pairs[1::2]):
+        attr = destination.split(".", 1)[1]
+        if attr != "create":
+            connections.append((attr, source))
+    return connections
+
+def is_instanced(node):
+    return len(cmds.listRelatives(node, allParents=True, fullPath=True) or []) > 1
+
+def is_referenced(node):
+    return cmds.referenceQuery(node, isNodeReferenced=True)
+
+def replace_curve_shapes(ctrl, shape_data):
+    old_shapes = curve_shapes(ctrl)
+    display = {}
+    connections = [incoming_connections(shape) for shape in old_shapes]
+    if old_shapes:
+        for attr in SHAPE_DISPLAY_ATTRS:
+            if cmds.attributeQuery(attr, node=old_shapes[0], exists=True):
+                display[attr] = cmds.getAttr(old_shapes[0] + "." + attr)
+        cmds.delete(old_shapes)
+
+    # Only shape nodes change, the transform with its keys and constraints stays as it is
+    shape_name = ctrl.split("|")[-1] + "Shape"
+    new_shapes = []
+    for i, data in enumerate(shape_data):
+        temp = cmds.curve(d=data["degree"], p=data["points"], k=data["knots"], per=data["periodic"])
+        shape = cmds.listRelatives(temp, shapes=True, fullPath=True)[0]
+        shape = cmds.parent(shape, ctrl, relative=True, shape=True)[0]
+        cmds.delete(temp)
+        shape = cmds.rename(shape, shape_name + (str(i) if i else ""))
+
+        for attr, value in display.items():
+            if cmds.attributeQuery(attr, node=shape, exists=True):
+                cmds.setAttr(shape + "." + attr, value)
+
+        # Rewire what drove the old shape, e.g. visibility from an IK/FK switch
+        for attr, source in (connections[min(i, len(connections) - 1)] if connections else []):
+            if not cmds.attributeQuery(attr.split("[")[0].split(".")[0], node=shape, exists=True):
+                cmds.warning("Could not reconnect %s to %s.%s, attribute does not exist." % (source, shape, attr))
+                continue
+            cmds.connectAttr(source, shape + "." + attr, force=True)
+        new_shapes.append(shape)
+    return new_shapes
+
+@undoable
+def swap_controller_shapes(controllers, shape_type, size=None):
+    if shape_type not in SHAPE_CREATORS:
+        cmds.warning("Shape type '%s' not supported." % shape_type)
+        return []
+
+    selection = cmds.ls(selection=True, long=True)
+    swapped = []
+    for ctrl in controllers:
+        # Deleting an instanced shape would remove it from every other parent too
+        if any(is_instanced(shape) for shape in curve_shapes(ctrl)):
+            cmds.warning("Skipping %s, its curve shape is instanced." % ctrl)
+            continue
+        # Shapes from a referenced file cannot be deleted in this scene
+        if any(is_referenced(shape) for shape in curve_shapes(ctrl)):
+            cmds.warning("Skipping %s, its curve shape is referenced." % ctrl)
+            continue
+        ctrl_size = size if size is not None else controller_size(ctrl, shape_type)
+        replace_curve_shapes(ctrl, get_shape_data(shape_type, ctrl_size))
+        swapped.append(ctrl)
+
+    if selection:
+        cmds.select(selection, replace=True)
+    return swapped
+
+def apply_controller_spec(spec):
+    created = []
+    for entry in spec:
+        include_offset = entry.get("offset", True)
+        if entry.get("color"):
+            color_index, rgb = COLOR_PRESETS[entry["color"]]
+        elif entry.get("rgb"):
+            color_index, rgb = entry.get("color_index"), entry["rgb"]
+        else:
+            color_index, rgb = side_color(entry["name"]) or (None, None)
+        result = create_custom_controller(entry["name"], entry.get("size", 1.0), entry.get("shape", "Circle"),
+                                          rgb=rgb, include_offset=include_offset, color_index=color_index)
+        if result is None:
+            continue
+        ctrl, offset_group = result if include_offset else (result, None)
+
+        if entry.get("match"):
+            match_transform_axes(offset_group or ctrl, entry["match"],
+                                 translate=entry.get("translate", (True, True, True)),
+                                 rotate=entry.get("rotate", (True, True, True)))
+        if entry.get("rotate_order"):
+            set_rotate_order([ctrl], entry["rotate_order"])
+        if offset_group and entry.get("lock_offset", True):
+            lock_channels([offset_group], TRANSFORM_ATTRS, "LockHide")
+        created.append(ctrl)
+    return created
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                         ~ Animation Utilities ~                                                  #
+# -----------------------------------------------------------------------------------------------------------------#
+# Matrices follow Maya's row-vector convention (world = local * parent). Angles are radians and
+# distances centimeters (Maya's internal units) until they are written back in UI units.
+
+# rotateOrder value: axes in the order they are applied
+ROTATE_ORDER_AXES = {
+    0: (0, 1, 2),  # XYZ
+    1: (1, 2, 0),  # YZX
+    2: (2, 0, 1),  # ZXY
+    3: (0, 2, 1),  # XZY
+    4: (1, 0, 2),  # YXZ
+    5: (2, 1, 0),  # ZYX
+}
+
+TRANSLATE_ROTATE_ATTRS = TRANSFORM_ATTRS[:6]
+
+def require_numpy():
+    if np is None:
+        cmds.warning("NumPy is not available in this Maya session.")
+        return False
+    return True
+
+def get_plug(plug):
+    selection = om.MSelectionList()
+    selection.add(plug)
+    return selection.getPlug(0)
+
+def read_plugs_at(mplugs, context):
+    if hasattr(context, "makeCurrent"):
+        # Maya 2022+: evaluate under the context instead of passing it to every read
+        previous = context.makeCurrent()
+        try:
+            return [mplug.asMObject() for mplug in mplugs]
+        finally:
+            previous.makeCurrent()
+    return [mplug.asMObject(context) for mplug in mplugs]
+
+def sample_matrix_plugs(plugs, frames):
+    # One DG context per frame shared by every plug, so the timeline never moves and each frame
+    # is evaluated once for all of them
+    mplugs = [get_plug(plug) for plug in plugs]
+    data = np.empty((len(plugs), len(frames), 4, 4))
+    for f, frame in enumerate(frames):
+        context = om.MDGContext(om.MTime(frame, om.MTime.uiUnit()))
+        for n, value in enumerate(read_plugs_at(mplugs, context)):
+            matrix = om.MFnMatrixData(value).matrix()
+            data[n, f] = [[matrix.getElement(r, c) for c in range(4)] for r in range(4)]
+    return data
+
+def sample_matrices(nodes, attr, frames):
+    return sample_matrix_plugs(["%s.%s" % (node, attr) for node in nodes], frames)
+
+def axis_rotations(angles, axis):
+    # Column-vector rotation matrices about one axis, (frames, 3, 3)
+    c, s = np.cos(angles), np.sin(angles)
+    mats = np.zeros(angles.shape + (3, 3))
+    j, k = [(1, 2), (2, 0), (0, 1)][axis]
+    mats[..., axis, axis] = 1.0
+    mats[..., j, j] = c
+    mats[..., k, k] = c
+    mats[..., j, k] = -s
+    mats[..., k, j] = s
+    return mats
+
+def euler_to_matrices(angles, rotate_order=0):
+    i, j, k = ROTATE_ORDER_AXES[rotate_order]
+    column = np.matmul(axis_rotations(angles[:, k], k),
+                       np.matmul(axis_rotations(angles[:, j], j), axis_rotations(angles[:, i], i)))
+    return np.swapaxes(column, -1, -2)
+
+def matrices_to_euler(rotations, rotate_order=0):
+    # rotations: (frames, 3, 3) without scale. Returns (frames, 3) as rotateX, rotateY, rotateZ
+    i, j, k = ROTATE_ORDER_AXES[rotate_order]
+    sign = 1.0 if (i, j, k) in [(0, 1, 2), (1, 2, 0), (2, 0, 1)] else -1.0
+    column = np.swapaxes(rotations, -1, -2)
+
+    cos_b = np.hypot(column[:, i, i], column[:, j, i])
+    gimbal = cos_b < 1e-8
+    angles = np.zeros((len(rotations), 3))
+    angles[:, j] = np.arctan2(-sign * column[:, k, i], cos_b)
+    angles[:, i] = np.where(gimbal,
+                            np.arctan2(-sign * column[:, j, k], column[:, j, j]),
+                            np.arctan2(sign * column[:, k, j], column[:, k, k]))
+    angles[:, k] = np.where(gimbal, 0.0, np.arctan2(sign * column[:, j, i], column[:, i, i]))
+    return angles
+
+def remove_scale(matrices):
+    rotations = matrices[..., :3, :3]
+    return rotations / np.linalg.norm(rotations, axis=-1, keepdims=True)
+
+# Terms of a transform's local matrix other than rotate and translate, read once per controller
+OFFSET_ATTRS = ["shear", "shearXY", "shearXZ", "shearYZ"] + [
+    attr + axis for attr in ["scale", "scalePivot", "scalePivotTranslate", "rotatePivot", "rotatePivotTranslate",
+                             "rotateAxis", "jointOrient"] for axis in ["", "X", "Y", "Z"]]
+
+def read_vector(node, attr):
+    # Internal units, radians and centimeters
+    return np.array([get_plug("%s.%s%s" % (node, attr, axis)).asDouble() for axis in "XYZ"])
+
+def translation_matrix(vector):
+    matrix = np.identity(4)
+    matrix[3, :3] = vector
+    return matrix
+
+def linear_matrix(block):
+    matrix = np.identity(4)
+    matrix[:3, :3] = block
+    return matrix
+
+def transform_offsets(node):
+    # Maya composes local = pre * R * post * T, with
+    #   transform: pre = [-sp] S SH [sp] [spt] [-rp] RA, post = [rp] [rpt]
+    #   joint:     pre = S RA, post = JO IS
+    # Returns (pre, post), or None when any of these terms is keyed or driven, since they are read once
+    if any(cmds.connectionInfo("%s.%s" % (node, attr), isDestination=True) for attr in OFFSET_ATTRS
+           if cmds.attributeQuery(attr, node=node, exists=True)):
+        return None
+
+    scale = np.diag(read_vector(node, "scale"))
+    rotate_axis = euler_to_matrices(read_vector(node, "rotateAxis")[None])[0]
+    if cmds.objectType(node, isAType="joint"):
+        inverse_scale = np.identity(3)
+        if cmds.getAttr(node + ".segmentScaleCompensate"):
+            inverse_scale = np.diag(1.0 / read_vector(node, "inverseScale"))
+        joint_orient = euler_to_matrices(read_vector(node, "jointOrient")[None])[0]
+        return (linear_matrix(np.matmul(scale, rotate_axis)),
+                linear_matrix(np.matmul(joint_orient, inverse_scale)))
+
+    xy, xz, yz = [get_plug("%s.%s" % (node, attr)).asDouble() for attr in ["shearXY", "shearXZ", "shearYZ"]]
+    shear = np.array([[1.0, 0.0, 0.0], [xy, 1.0, 0.0], [xz, yz, 1.0]])
+    scale_pivot = read_vector(node, "scalePivot")
+    rotate_pivot = read_vector(node, "rotatePivot")
+    pre = translation_matrix(-scale_pivot)
+    for matrix in [linear_matrix(np.matmul(scale, shear)), translation_matrix(scale_pivot),
+                   translation_matrix(read_vector(node, "scalePivotTranslate")), translation_matrix(-rotate_pivot),
+                   linear_matrix(rotate_axis)]:
+        pre = np.matmul(pre, matrix)
+    post = np.matmul(translation_matrix(rotate_pivot), translation_matrix(read_vector(node, "rotatePivotTranslate")))
+    return pre, post
+
+def local_transforms(world, parent, rotate_order=0, offsets=None):
+    # world, parent: (frames, 4, 4), offsets from transform_offsets. Returns translate and rotate, (frames, 3) each
+    pre, post = offsets if offsets is not None else (np.identity(4), np.identity(4))
+    local = np.matmul(world, np.linalg.inv(parent))
+    rotation = np.matmul(np.matmul(np.linalg.inv(pre[:3, :3]), local[:, :3, :3]), np.linalg.inv(post[:3, :3]))
+    rotate = np.unwrap(matrices_to_euler(remove_scale(rotation), rotate_order), axis=0)
+
+    # Translate is whatever is left after pre * R * post
+    composed = np.tile(np.identity(4), (len(local), 1, 1))
+    composed[:, :3, :3] = euler_to_matrices(rotate, rotate_order)
+    composed = np.matmul(np.matmul(pre, composed), post)
+    translate = local[:, 3, :3] - composed[:, 3, :3]
+    return translate, rotate
+
+def hierarchy_levels(nodes):
+    # Indices of nodes grouped parent-first by how many of the other nodes sit above them in the DAG
+    paths = [cmds.ls(node, long=True)[0] for node in nodes]
+    members = set(paths)
+    levels = {}
+    for n, path in enumerate(paths):
+        parts = path.split("|")
+        depth = len([i for i in range(2, len(parts)) if "|".join(parts[:i]) in members])
+        levels.setdefault(depth, []).append(n)
+    return [levels[depth] for depth in sorted(levels)]
+
+def settable_attrs(node, attrs):
+    return [attr for attr in attrs if cmds.getAttr(node + "." + attr, settable=True)]
+
+def to_ui_value(attr, value):
+    if attr.startswith("rotate"):
+        return om.MAngle(float(value)).asUnits(om.MAngle.uiUnit())
+    if attr.startswith("translate"):
+        return om.MDistance(float(value)).asUnits(om.MDistance.uiUnit())
+    return float(value)
+
+def anim_curve_type(attr):
+    if attr.startswith("rotate"):
+        return "animCurveTA"
+    if attr.startswith("translate"):
+        return "animCurveTL"
+    return "animCurveTU"
+
+def write_key_arrays(node, channels, frames, tangent="linear"):
+    # channels: attr -> values per frame. Each curve is written with one setAttr on a scratch anim curve
+    # and pasted over the range, so existing keys outside it survive and everything stays undoable.
+    flat_times = [float(frame) for frame in frames]
+    for attr, values in channels.items():
+        curve = cmds.createNode(anim_curve_type(attr), name="CTRLonDemand_bakeCurve", skipSelect=True)
+        flat = []
+        for frame, value in zip(flat_times, values):
+            flat.extend([frame, to_ui_value(attr, value)])
+        cmds.setAttr("%s.ktv[0:%d]" % (curve, len(frames) - 1), *flat, size=len(frames))
+
+        if tangent == "step":
+            cmds.keyTangent(curve, outTangentType="step")
+        else:
+            cmds.keyTangent(curve, inTangentType=tangent, outTangentType=tangent)
+
+        cmds.copyKey(curve)
+        cmds.pasteKey(node, attribute=attr, option="replace", time=(flat_times[0], flat_times[-1]))
+        cmds.delete(curve)
+
+def set_internal_values(node, channels):
+    # Single-frame counterpart of write_key_arrays
+    for attr, value in channels.items():
+        cmds.setAttr(node + "." + attr, to_ui_value(attr, value))
+
+def is_animated(plug):
+    return bool(cmds.keyframe(plug, q=True, keyframeCount=True))
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                          ~ Space Switching ~                                                     #
+# -----------------------------------------------------------------------------------------------------------------#
+# On each switched controller: the enum attribute name, and a message connection from a shared driver node.
+# Nothing stores a DAG path, so the rig can be renamed or reparented after building.
+SPACE_ATTR_ATTR = "spaceSwitchAttr"
+SPACE_DRIVER_ATTR = "spaceSwitchDriver"
+
+def clean_name(name):
+    return name.split("|")[-1].replace(":", "_").replace(".", "_")
+
+def get_offset_group(ctrl, offset_suffix="_offset"):
+    parent = cmds.listRelatives(ctrl, parent=True, fullPath=True) or []
+    if parent and parent[0].endswith(offset_suffix):
+        return parent[0]
+    return None
+
+def get_space_locator(space):
+    # One locator per space, shared by every controller that switches into it. Reuse is decided by
+    # what sits directly under the space, so spaces with the same short name keep separate locators.
+    name = clean_name(space) + "_space_loc"
+    if space == "world":
+        candidates = cmds.ls(assemblies=True, long=True) or []
+    else:
+        candidates = cmds.listRelatives(space, children=True, type="transform", fullPath=True) or []
+    for node in candidates:
+        if re.match(re.escape(name) + r"\d*$", node.split("|")[-1]) and \
+                cmds.listRelatives(node, shapes=True, type="locator"):
+            return node
+
+    locator = cmds.spaceLocator(name=name)[0]
+    if space != "world":
+        locator = cmds.parent(locator, space, relative=True)[0]
+    cmds.setAttr(locator + ".visibility", 0)
+    lock_channels([locator], TRANSFORM_ATTRS, "LockHide")
+    return cmds.ls(locator, long=True)[0]
+
+def add_space_attr(node, attr_name, spaces, default=0):
+    plug = node + "." + attr_name
+    if not cmds.attributeQuery(attr_name, node=node, exists=True):
+        cmds.addAttr(node, longName=attr_name, attributeType="enum",
+                     enumName=":".join(clean_name(space) for space in spaces), defaultValue=default)
+        cmds.setAttr(plug, edit=True, keyable=True)
+        cmds.setAttr(plug, default)
+    return plug
+
+def get_space_condition(plug, index, space):
+    # One condition per (driver attribute, space), shared by every controller on the same driver.
+    # Only reuse a condition that already compares this exact plug against this index.
+    for term in cmds.listConnections(plug, source=False, destination=True, plugs=True, type="condition") or []:
+        condition, attr = term.split(".", 1)
+        if attr == "firstTerm" and cmds.getAttr(condition + ".operation") == 0 and \
+                cmds.getAttr(condition + ".secondTerm") == index:
+            return condition
+
+    condition = cmds.createNode("condition", name="%s_%s_cond" % (clean_name(plug), clean_name(space)))
+    cmds.connectAttr(plug, condition + ".firstTerm")
+    cmds.setAttr(condition + ".secondTerm", index)
+    cmds.setAttr(condition + ".operation", 0)  # Equal
+    cmds.setAttr(condition + ".colorIfTrueR", 1)
+    cmds.setAttr(condition + ".colorIfFalseR", 0)
+    return condition
+
+def constrain_offset(offset_group, locators):
+    # Offset groups are usually locked by safe_set_attr, unlock long enough to connect the constraint
+    attrs = TRANSLATE_ROTATE_ATTRS
+    locked = [attr for attr in attrs if cmds.getAttr(offset_group + "." + attr, lock=True)]
+    for attr in locked:
+        cmds.setAttr(offset_group + "." + attr, lock=False)
+
+    constraint = cmds.parentConstraint(locators, offset_group, maintainOffset=True,
+                                       name=clean_name(offset_group) + "_spaceConstraint")[0]
+
+    for attr in locked:
+        cmds.setAttr(offset_group + "." + attr, lock=True)
+    return constraint
+
+@undoable
+def create_space_switch(controllers, spaces, attr_name="space", driver=None, default=0):
+    if not spaces:
+        cmds.warning("Give at least one space.")
+        return []
+
+    locators = [get_space_locator(space) for space in spaces]
+    shared_plug = add_space_attr(driver, attr_name, spaces, default) if driver else None
+
+    built = []
+    for ctrl in controllers:
+        offset_group = get_offset_group(ctrl)
+        if not offset_group:
+            cmds.warning("No offset group above %s, skipping space switch." % ctrl)
+            continue
+        if cmds.listRelatives(offset_group, type="parentConstraint"):
+            cmds.warning("%s is already constrained, skipping space switch." % offset_group)
+            continue
+
+        plug = shared_plug or add_space_attr(ctrl, attr_name, spaces, default)
+        constraint = constrain_offset(offset_group, locators)
+        weights = cmds.parentConstraint(constraint, q=True, weightAliasList=True)
+        for index, (space, weight) in enumerate(zip(spaces, weights)):
+            condition = get_space_condition(plug, index, space)
+            cmds.connectAttr(condition + ".outColorR", constraint + "." + weight, force=True)
+
+        if not cmds.attributeQuery(SPACE_ATTR_ATTR, node=ctrl, exists=True):
+            cmds.addAttr(ctrl, longName=SPACE_ATTR_ATTR, dataType="string")
+        cmds.setAttr(ctrl + "." + SPACE_ATTR_ATTR, attr_name, type="string")
+        if driver:
+            if not cmds.attributeQuery(SPACE_DRIVER_ATTR, node=ctrl, exists=True):
+                cmds.addAttr(ctrl, longName=SPACE_DRIVER_ATTR, attributeType="message")
+            cmds.connectAttr(driver + ".message", ctrl + "." + SPACE_DRIVER_ATTR, force=True)
+        built.append(ctrl)
+    return built
+
+def get_space_plug(ctrl):
+    if not cmds.attributeQuery(SPACE_ATTR_ATTR, node=ctrl, exists=True):
+        return None
+    attr = cmds.getAttr(ctrl + "." + SPACE_ATTR_ATTR)
+
+    node = ctrl
+    if cmds.attributeQuery(SPACE_DRIVER_ATTR, node=ctrl, exists=True):
+        drivers = cmds.listConnections(ctrl + "." + SPACE_DRIVER_ATTR, source=True, destination=False) or []
+        if drivers:
+            node = drivers[0]
+    node = cmds.ls(node, long=True)[0]
+
+    if not attr or not cmds.attributeQuery(attr, node=node, exists=True):
+        return None
+    return node + "." + attr
+
+def space_index(plug, space):
+    node, attr = plug.split(".", 1)
+    names = cmds.attributeQuery(attr, node=node, listEnum=True)[0].split(":")
+    if isinstance(space, int):
+        return space if 0 <= space < len(names) else None
+    space = clean_name(space)
+    return names.index(space) if space in names else None
+
+@undoable
+def switch_space(controllers, space, start=None, end=None):
+    if not require_numpy():
+        return []
+
+    groups = {}
+    for ctrl in controllers:
+        plug = get_space_plug(ctrl)
+        if plug is None:
+            cmds.warning("%s has no space switch." % ctrl)
+            continue
+        index = space_index(plug, space)
+        if index is None:
+            cmds.warning("Space '%s' is not available on %s." % (space, plug))
+            continue
+        groups.setdefault((plug, index), []).append(ctrl)
+
+    # Check every controller before anything is keyed. Controls sharing a driver switch together, so one
+    # that cannot be solved holds back its whole group.
+    offsets = {}
+    for key, members in list(groups.items()):
+        for ctrl in members:
+            offsets[ctrl] = transform_offsets(ctrl)
+        unsolvable = [ctrl for ctrl in members if offsets[ctrl] is None]
+        if unsolvable:
+            cmds.warning("Skipping %s, scale, pivots, rotate axis or joint orient are animated on %s."
+                         % (key[0], ", ".join(unsolvable)))
+            del groups[key]
+    if not groups:
+        return []
+
+    animated = start is not None and end is not None
+    frames = list(range(int(start), int(end) + 1)) if animated else [cmds.currentTime(q=True)]
+    ctrls = [ctrl for members in groups.values() for ctrl in members]
+
+    # World pose before the switch, for every controller and frame in one pass
+    world = sample_matrices(ctrls, "worldMatrix[0]", frames)
+
+    for plug, index in groups:
+        if animated or is_animated(plug):
+            node, attr = plug.split(".", 1)
+            write_key_arrays(node, {attr: [index] * len(frames)}, frames, tangent="step")
+        else:
+            cmds.setAttr(plug, index)
+
+    # Parent matrices under the new space, then solve local values that keep the world pose. Parents are
+    # re-sampled per hierarchy level so controls under another switched control see its corrected pose.
+    for level in hierarchy_levels(ctrls):
+        parent = sample_matrices([ctrls[n] for n in level], "parentMatrix[0]", frames)
+        for p, n in enumerate(level):
+            ctrl = ctrls[n]
+            translate, rotate = local_transforms(world[n], parent[p], cmds.getAttr(ctrl + ".rotateOrder"),
+                                                 offsets[ctrl])
+            values = np.concatenate([translate, rotate], axis=1)
+            settable = settable_attrs(ctrl, TRANSLATE_ROTATE_ATTRS)
+            channels = {attr: values[:, a] for a, attr in enumerate(TRANSLATE_ROTATE_ATTRS) if attr in settable}
+            if animated or any(is_animated(ctrl + "." + attr) for attr in channels):
+                write_key_arrays(ctrl, channels, frames)
+            else:
+                set_internal_values(ctrl, {attr: column[0] for attr, column in channels.items()})
+    return ctrls
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                         ~ Motion Capture Retarget ~                                              #
+# -----------------------------------------------------------------------------------------------------------------#
+def reduce_keys(frames, values, tolerance):
+    # Keeps the fewest keys whose linear interpolation stays within tolerance of every sampled frame
+    frames = np.asarray(frames, dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = np.zeros(len(values), dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(values) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        blend = (frames[first + 1:last] - frames[first]) / (frames[last] - frames[first])
+        error = np.abs(values[first + 1:last] - (values[first] + blend * (values[last] - values[first])))
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+def retarget_world(source, ctrl, translate, rotate, rotate_order=0, maintain_offset=False):
+    # Same per-axis semantics as match_transform_axes: unmatched world axes keep the controller's own values
+    if maintain_offset:
+        offset = np.matmul(ctrl[0], np.linalg.inv(source[0]))
+        source = np.matmul(offset[None], source)
+
+    target = ctrl.copy()
+    target[:, 3, :3] = np.where(np.array(translate, dtype=bool), source[:, 3, :3], ctrl[:, 3, :3])
+
+    if any(rotate):
+        if all(rotate):
+            rotation = remove_scale(source)
+        else:
+            angles = np.where(np.array(rotate, dtype=bool),
+                              matrices_to_euler(remove_scale(source), rotate_order),
+                              matrices_to_euler(remove_scale(ctrl), rotate_order))
+            rotation = euler_to_matrices(angles, rotate_order)
+        target[:, :3, :3] = rotation * np.linalg.norm(ctrl[:, :3, :3], axis=-1, keepdims=True)
+    return target
+
+@undoable
+def retarget_to_controllers(mapping, start, end, translate=(True, True, True), rotate=(True, True, True),
+                            maintain_offset=False, tolerance=None, angle_tolerance=None):
+    if not require_numpy():
+        return []
+
+    pairs = list(mapping.items()) if isinstance(mapping, dict) else list(mapping)
+    if not pairs:
+        cmds.warning("Nothing to retarget.")
+        return []
+
+    frames = list(range(int(start), int(end) + 1))
+    sources = [source for source, _ in pairs]
+    ctrls = [ctrl for _, ctrl in pairs]
+
+    # Source and controller world matrices for every frame in a single pass
+    count = len(pairs)
+    samples = sample_matrices(sources + ctrls, "worldMatrix[0]", frames)
+    source_world, ctrl_world = samples[:count], samples[count:]
+
+    attrs = []
+    if any(translate):
+        attrs.extend(TRANSLATE_ROTATE_ATTRS[:3])
+    if any(rotate):
+        attrs.extend(TRANSLATE_ROTATE_ATTRS[3:])
+    if angle_tolerance is None:
+        angle_tolerance = tolerance
+
+    # Bake parent-first and re-sample the offset groups (parents) of each level after the level above
+    # is keyed, so an FK chain is solved against its already baked parents
+    for level in hierarchy_levels(ctrls):
+        parent = sample_matrices([ctrls[n] for n in level], "parentMatrix[0]", frames)
+        for p, n in enumerate(level):
+            ctrl = ctrls[n]
+            offsets = transform_offsets(ctrl)
+            if offsets is None:
+                cmds.warning("Skipping %s, its scale, pivots, rotate axis or joint orient are animated." % ctrl)
+                continue
+            rotate_order = cmds.getAttr(ctrl + ".rotateOrder")
+            target = retarget_world(source_world[n], ctrl_world[n], translate, rotate, rotate_order,
+                                    maintain_offset)
+            local_translate, local_rotate = local_transforms(target, parent[p], rotate_order, offsets)
+            values = np.concatenate([local_translate, local_rotate], axis=1)
+
+            for attr in settable_attrs(ctrl, attrs):
+                column = values[:, TRANSLATE_ROTATE_ATTRS.index(attr)]
+                if tolerance is None:
+                    write_key_arrays(ctrl, {attr: column}, frames)
+                    continue
+                limit = np.radians(angle_tolerance) if attr.startswith("rotate") else tolerance
+                kept = reduce_keys(frames, column, limit)
+                write_key_arrays(ctrl, {attr: column[kept]}, [frames[i] for i in kept])
+    return ctrls
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                          ~ Batch Operations ~                                                    #
+# -----------------------------------------------------------------------------------------------------------------#
+# Entry points used by CTRLonDemandBatch on an already opened scene. Each takes an options dict and
+# returns the nodes it changed; errors are raised so the batch driver can log them per file.
+
+def resolve_batch_targets(options):
+    # Without explicit targets the operation applies to every controller in the scene
+    targets = options.get("targets")
+    if targets:
+        nodes = cmds.ls(targets, long=True) or []
+    else:
+        nodes = list_scene_controllers()
+    if not nodes:
+        raise ValueError("No batch targets found for %s" % (targets or "scene controllers"))
+    return nodes
+
+def batch_lock_channels(options):
+    return lock_channels(resolve_batch_targets(options), options.get("attrs", TRANSFORM_ATTRS),
+                         options.get("mode", "LockHide"))
+
+def batch_rotate_order(options):
+    return set_rotate_order(find_controllers(resolve_batch_targets(options)), options["order"])
+
+def batch_change_color(options):
+    if options.get("color"):
+        color_index, rgb = COLOR_PRESETS[options["color"]]
+    else:
+        color_index, rgb = options.get("color_index"), options.get("rgb")
+    return change_color(find_controllers(resolve_batch_targets(options)), color_index=color_index, rgb=rgb)
+
+def batch_side_color(options):
+    return recolor_by_side(find_controllers(resolve_batch_targets(options)))
+
+def batch_swap_shape(options):
+    return swap_controller_shapes(find_controllers(resolve_batch_targets(options)), options["shape"],
+                                  size=options.get("size"))
+
+def batch_match_transform(options):
+    matched = []
+    for source, target in options["pairs"]:
+        match_transform_axes(source, target,
+                             translate=options.get("translate", (True, True, True)),
+                             rotate=options.get("rotate", (True, True, True)))
+        matched.append(source)
+    return matched
+
+def batch_apply_spec(options):
+    spec = options.get("spec")
+    if spec is None:
+        with open(options["spec_file"]) as f:
+            spec = json.load(f)
+    return apply_controller_spec(spec)
+
+BATCH_OPERATIONS = {
+    "lock_channels": batch_lock_channels,
+    "rotate_order": batch_rotate_order,
+    "change_color": batch_change_color,
+    "side_color": batch_side_color,
+    "swap_shape": batch_swap_shape,
+    "match_transform": batch_match_transform,
+    "apply_spec": batch_apply_spec,
+}
+
+def run_batch_operation(operation, options):
+    if options.get("palette_file"):
+        load_palette(options["palette_file"])
+    if operation not in BATCH_OPERATIONS:
+        raise ValueError("Unknown batch operation '%s'" % operation)
+    changed = BATCH_OPERATIONS[operation](options)
+    if not changed:
+        raise ValueError("Batch operation '%s' changed nothing in this scene" % operation)
+    return changed
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                             ~ Rig Audit ~                                                        #
+# -----------------------------------------------------------------------------------------------------------------#
+AUDIT_CONFIG = {
+    "offset_suffix": "_offset",
+    "side_colors": SIDE_COLORS,
+    "prefixes": None,   # e.g. ["L", "R", "C"], None accepts any prefix
+    "suffix": None,     # e.g. "ctrl", None accepts any suffix
+    "tolerance": 1e-4,
+}
+
+def list_scene_controllers():
+    shapes = cmds.ls(type="nurbsCurve", long=True, noIntermediate=True) or []
+    if not shapes:
+        return []
+    return sorted(set(cmds.listRelatives(shapes, parent=True, fullPath=True) or []))
+
+def read_channel_states(node_fn):
+    states = {}
+    for attr in TRANSFORM_ATTRS:
+        plug = node_fn.findPlug(attr, False)
+        states[attr] = {
+            "value": plug.asDouble(),
+            "locked": plug.isLocked,
+            "keyable": plug.isKeyable,
+            "channelBox": plug.isChannelBox,
+        }
+    return states
+
+def gather_controller_data(controllers, offset_suffix="_offset"):
+    # One API pass over every controller, no per-attribute cmds queries
+    selection = om.MSelectionList()
+    for ctrl in controllers:
+        selection.add(ctrl)
+
+    records = []
+    for i in range(selection.length()):
+        dag = selection.getDagPath(i)
+        node_fn = om.MFnDagNode(dag)
+        record = {
+            "node": dag.fullPathName(),
+            "name": node_fn.name(),
+            "attrs": read_channel_states(node_fn),
+            "shapes": [],
+            "offset": None,
+        }
+
+        for c in range(node_fn.childCount()):
+            child = node_fn.child(c)
+            if not child.hasFn(om.MFn.kNurbsCurve):
+                continue
+            shape_fn = om.MFnDagNode(child)
+            if shape_fn.isIntermediateObject:
+                continue
+            record["shapes"].append({
+                "node": shape_fn.fullPathName(),
+                "enabled": shape_fn.findPlug("overrideEnabled", False).asBool(),
+                "rgb_mode": shape_fn.findPlug("overrideRGBColors", False).asBool(),
+                "index": shape_fn.findPlug("overrideColor", False).asInt(),
+                "rgb": [shape_fn.findPlug("overrideColor" + channel, False).asFloat() for channel in "RGB"],
+            })
+
+        parent = node_fn.parent(0)
+        if parent.hasFn(om.MFn.kTransform):
+            parent_fn = om.MFnDagNode(parent)
+            if parent_fn.name().endswith(offset_suffix):
+                record["offset"] = {
+                    "node": parent_fn.fullPathName(),
+                    "name": parent_fn.name(),
+                    "attrs": read_channel_states(parent_fn),
+                }
+        records.append(record)
+    return records
+
+def audit_offset_locked(record, config):
+    offset = record["offset"]
+    if not offset:
+        return None
+    open_attrs = [attr for attr in TRANSFORM_ATTRS
+                  if not offset["attrs"][attr]["locked"]
+                  or offset["attrs"][attr]["keyable"]
+                  or offset["attrs"][attr]["channelBox"]]
+    if open_attrs:
+        return "Offset group channels not locked/hidden: %s" % ", ".join(open_attrs)
+    return None
+
+def fix_offset_locked(record, config):
+    safe_set_attr(record["offset"]["node"], TRANSFORM_ATTRS, lock=True, keyable=False, channelBox=False)
+
+def audit_zeroed(record, config):
+    tolerance = config["tolerance"]
+    dirty = []
+    for attr in TRANSFORM_ATTRS[:9]:
+        rest = 1.0 if attr.startswith("scale") else 0.0
+        if abs(record["attrs"][attr]["value"] - rest) > tolerance:
+            dirty.append(attr)
+    if dirty:
+        return "Transforms not zeroed: %s" % ", ".join(dirty)
+    return None
+
+def audit_side_color(record, config):
+    side = get_side(record["name"])
+    if side not in config["side_colors"]:
+        return None
+
+    label = config["side_colors"][side]
     index, rgb = COLOR_PRESETS[label]
-    CURRENT_COLOR_INDEX[0] = index
+    for shape in record["shapes"]:
+        if not shape["enabled"]:
+            return "No color override, expected %s for side %s" % (label, side)
+        if shape["rgb_mode"]:
+            match = all(abs(a - b) <= config["tolerance"] for a, b in zip(shape["rgb"], rgb))
+        else:
+            match = shape["index"] == index
+        if not match:
+            return "Color does not match side %s, expected %s" % (side, label)
+    return None
+
+def fix_side_color(record, config):
+    index, rgb = COLOR_PRESETS[config["side_colors"][get_side(record["name"])]]
+    color_controller(record["node"], color_index=index, rgb=rgb)
+
+def audit_naming(record, config):
+    name = record["name"].split(":")[-1]
+    tokens = name.split("_")
+    if not all(tokens):
+        return "Empty prefix/name/suffix token in '%s'" % name
+    if config["prefixes"] and tokens[0] not in config["prefixes"]:
+        return "Prefix '%s' is not one of: %s" % (tokens[0], ", ".join(config["prefixes"]))
+    if config["suffix"] and (len(tokens) < 2 or tokens[-1] != config["suffix"]):
+        return "Name '%s' does not end with suffix '%s'" % (name, config["suffix"])
+    return None
+
+# rule name: (check, auto-fix or None)
+AUDIT_RULES = {
+    "offset_locked": (audit_offset_locked, fix_offset_locked),
+    "zeroed_transforms": (audit_zeroed, None),
+    "side_color": (audit_side_color, fix_side_color),
+    "naming": (audit_naming, None),
+}
 
-    if tab == "create":
-        CURRENT_COLOR_RGB_CREATE[:] = rgb
-        cmds.button("colorPreviewCreate", e=True, bgc=rgb)
+def audit_rig(controllers=None, rules=None, config=None, fix=False, report_path=None):
+    settings = dict(AUDIT_CONFIG)
+    settings.update(config or {})
+
+    rule_names = list(rules) if rules else list(AUDIT_RULES.keys())
+    unknown = [rule for rule in rule_names if rule not in AUDIT_RULES]
+    if unknown:
+        cmds.warning("Unknown audit rule(s): %s" % ", ".join(unknown))
+        return None
+
+    if controllers is None:
+        controllers = list_scene_controllers()
     else:
-        CURRENT_COLOR_RGB_ADJUST[:] = rgb
-        cmds.button("colorPreviewAdjust", e=True, bgc=rgb)
+        controllers = cmds.ls(controllers, long=True) or []
+
+    records = gather_controller_data(controllers, settings["offset_suffix"])
+
+    issues = []
+    for record in records:
+        for rule in rule_names:
+            check, fixer = AUDIT_RULES[rule]
+            message = check(record, settings)
+            if not message:
+                continue
+            fixed = False
+            if fix and fixer:
+                fixer(record, settings)
+                fixed = True
+            issues.append({
+                "node": record["node"],
+                "rule": rule,
+                "message": message,
+                "fixable": fixer is not None,
+                "fixed": fixed,
+            })
+
+    report = {
+        "scene": cmds.file(q=True, sceneName=True),
+        "controllers": len(records),
+        "rules": rule_names,
+        "issues": issues,
+        "passed": all(issue["fixed"] for issue in issues),
+    }
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                           ~ UI Callbacks ~                                                       #
+# -----------------------------------------------------------------------------------------------------------------#
+def set_current_color(tab, index, rgb):
+    CURRENT_COLOR[tab]["index"] = index
+    CURRENT_COLOR[tab]["rgb"] = list(rgb)
+    preview = "colorPreviewCreate" if tab == "create" else "colorPreviewAdjust"
+    cmds.button(preview, e=True, bgc=rgb)
+
+def select_preset_color(label, tab="create"):
+    index, rgb = COLOR_PRESETS[label]
+    set_current_color(tab, index, rgb)
 
     update_name_preview()
 
@@ -162,13 +1328,41 @@ def open_color_picker(tab="create"):
     result = cmds.colorEditor()
     if cmds.colorEditor(query=True, result=True):
         rgb = cmds.colorEditor(query=True, rgb=True)
+        set_current_color(tab, nearest_color_index(rgb), rgb)
 
-        if tab == "create":
-            CURRENT_COLOR_RGB_CREATE[:] = rgb
-            cmds.button("colorPreviewCreate", e=True, bgc=rgb)
-        else:
-            CURRENT_COLOR_RGB_ADJUST[:] = rgb
-            cmds.button("colorPreviewAdjust", e=True, bgc=rgb)
+def refresh_preset_rows():
+    # Only the preset buttons follow the palette, everything else the user entered stays
+    for tab in ("create", "adjust"):
+        row = tab + "PresetRow"
+        if not cmds.columnLayout(row, exists=True):
+            continue
+        path = cmds.columnLayout(row, query=True, fullPathName=True)
+        children = cmds.columnLayout(row, query=True, childArray=True) or []
+        if children:
+            cmds.deleteUI([path + "|" + child for child in children])
+        cmds.setParent(path)
+        format_button_row(preset_buttons(tab))
+
+def on_palette_changed(name):
+    if set_active_palette(name):
+        refresh_preset_rows()
+
+def on_load_palette(*_):
+    paths = cmds.fileDialog2(fileFilter="Palette (*.json)", fileMode=1, caption="Load Palette")
+    if not paths:
+        return
+    try:
+        name = load_palette(paths[0])
+    except (IOError, OSError, ValueError, KeyError) as e:
+        cmds.warning("Could not load palette %s: %s" % (paths[0], str(e)))
+        return
+    if cmds.optionMenu("paletteMenu", exists=True):
+        items = cmds.optionMenu("paletteMenu", query=True, itemListLong=True) or []
+        if name not in [cmds.menuItem(item, query=True, label=True) for item in items]:
+            cmds.menuItem(label=name, parent="paletteMenu")
+        cmds.optionMenu("paletteMenu", edit=True, value=name)
+    refresh_preset_rows()
+    cmds.warning("Loaded palette: %s" % name)
 
 def on_create_button(name_field, prefix_field, suffix_field, size_field, shape_option):
     selection = cmds.ls(selection=True)
@@ -191,42 +1385,26 @@ def on_create_button(name_field, prefix_field, suffix_field, size_field, shape_o
         ("_" + suffix) if suffix else ""
     )
 
-    result = create_custom_controller(full_name, size, shape, rgb=CURRENT_COLOR_RGB_CREATE, include_offset=include_offset)
+    color_index, rgb = CURRENT_COLOR["create"]["index"], CURRENT_COLOR["create"]["rgb"]
+    if cmds.checkBox("autoSideColorCheck", q=True, value=True):
+        color_index, rgb = side_color(full_name) or (color_index, rgb)
+
+    result = create_custom_controller(full_name, size, shape, rgb=rgb, include_offset=include_offset,
+                                      color_index=color_index)
 
     if do_match and selection:
         target = selection[0]
         if cmds.objectType(target) in ["joint", "locator"]:
             source = result[1] if include_offset else result
-
-            t_all = cmds.checkBox("createMatchTranslateAll", q=True, value=True)
-            t_axes = [cmds.checkBox("createMatchTranslate" + axis, q=True, value=True) for axis in "XYZ"]
-
-            r_all = cmds.checkBox("createMatchRotateAll", q=True, value=True)
-            r_axes = [cmds.checkBox("createMatchRotate" + axis, q=True, value=True) for axis in "XYZ"]
-
-            if t_all or any(t_axes):
-                t_values = cmds.xform(target, q=True, ws=True, t=True)
-                if not t_all:
-                    s_values = cmds.xform(source, q=True, ws=True, t=True)
-                    t_values = [t if a else s for t, s, a in zip(t_values, s_values, t_axes)]
-                cmds.xform(source, ws=True, t=t_values)
-
-            if r_all or any(r_axes):
-                r_values = cmds.xform(target, q=True, ws=True, ro=True)
-                if not r_all:
-                    s_values = cmds.xform(source, q=True, ws=True, ro=True)
-                    r_values = [r if a else s for r, s, a in zip(r_values, s_values, r_axes)]
-                cmds.xform(source, ws=True, ro=r_values)
-
+            match_transform_axes(source, target,
+                                 translate=read_match_axes("createMatchTranslate"),
+                                 rotate=read_match_axes("createMatchRotate"))
             cmds.warning(source + " matched transform to: " + target)
         else:
             cmds.warning("Selected object is not a joint or locator. Skipping matchTransform.")
     if include_offset and lock_offset_channels:
         offset_group = result[1]
-        attrs = ["translateX", "translateY", "translateZ",
-                 "rotateX", "rotateY", "rotateZ",
-                 "scaleX", "scaleY", "scaleZ", "visibility"]
-        safe_set_attr(offset_group, attrs, lock=True, keyable=False, channelBox=False)
+        lock_channels([offset_group], TRANSFORM_ATTRS, "LockHide")
         cmds.warning("Locked and hid all channels on offset group: %s" % offset_group)
 
 
@@ -243,6 +1421,11 @@ def update_name_preview():
     if cmds.control("namePreviewField", exists=True):
         cmds.textField("namePreviewField", e=True, text=full_name)
 
+def read_match_axes(prefix):
+    if cmds.checkBox(prefix + "All", q=True, value=True):
+        return [True, True, True]
+    return [cmds.checkBox(prefix + axis, q=True, value=True) for axis in "XYZ"]
+
 def lock_mode_sync(active):
     cmds.checkBox("modeLock", e=True, value=(active == "Lock"))
     cmds.checkBox("modeLockHide", e=True, value=(active == "LockHide"))
@@ -254,46 +1437,28 @@ def adjust_lock_channels(*_):
         cmds.warning("Select a controller or offset group.")
         return
 
-    lock = [None]
-    keyable = True
-    channelBox = [None]
     # Which attributes
     attrs = []
-
-    # Translate
-    t_all = cmds.checkBox("lockTranslateAll", q=True, value=True)
-    if t_all or cmds.checkBox("lockTranslateX", q=True, value=True): attrs.append("translateX")
-    if t_all or cmds.checkBox("lockTranslateY", q=True, value=True): attrs.append("translateY")
-    if t_all or cmds.checkBox("lockTranslateZ", q=True, value=True): attrs.append("translateZ")
-
-    # Rotate
-    r_all = cmds.checkBox("lockRotateAll", q=True, value=True)
-    if r_all or cmds.checkBox("lockRotateX", q=True, value=True): attrs.append("rotateX")
-    if r_all or cmds.checkBox("lockRotateY", q=True, value=True): attrs.append("rotateY")
-    if r_all or cmds.checkBox("lockRotateZ", q=True, value=True): attrs.append("rotateZ")
-
-    # Scale
-    s_all = cmds.checkBox("lockScaleAll", q=True, value=True)
-    if s_all or cmds.checkBox("lockScaleX", q=True, value=True): attrs.append("scaleX")
-    if s_all or cmds.checkBox("lockScaleY", q=True, value=True): attrs.append("scaleY")
-    if s_all or cmds.checkBox("lockScaleZ", q=True, value=True): attrs.append("scaleZ")
+    for prefix, channel in [("lockTranslate", "translate"), ("lockRotate", "rotate"), ("lockScale", "scale")]:
+        for axis, enabled in zip("XYZ", read_match_axes(prefix)):
+            if enabled:
+                attrs.append(channel + axis)
 
     # Visibility (no axis options)
     if cmds.checkBox("lockVisibility", q=True, value=True): attrs.append("visibility")
 
     # Mode
-    if cmds.checkBox("modeLock", q=True, value=True):
-        lock, keyable, channelBox = True, False, True
-    elif cmds.checkBox("modeLockHide", q=True, value=True):
-        lock, keyable, channelBox = True, False, False
-    elif cmds.checkBox("modeUnlock", q=True, value=True):   # Unlock
-        lock, keyable, channelBox = False, True, True
-
-    # Apply to controller or its child with shape
-    for obj in selection:
-        safe_set_attr(node=obj, attrs=attrs, lock=lock, keyable=keyable, channelBox=channelBox)
-        cmds.warning("Updated lock state on: %s" % obj)
+    mode = None
+    for name in ["Lock", "LockHide", "Unlock"]:
+        if cmds.checkBox("mode" + name, q=True, value=True):
+            mode = name
+            break
+    if mode is None:
+        cmds.warning("Choose a lock operation.")
+        return
 
+    for obj in lock_channels(selection, attrs, mode):
+        cmds.warning("Updated lock state on: %s" % obj)
 
 
 def adjust_rotate_order(*_):
@@ -303,34 +1468,15 @@ def adjust_rotate_order(*_):
         return
 
     selected_order_label = cmds.optionMenu("rotationOrder", q=True, value=True)
-    rotation_order = ROTATION_ORDER.get(selected_order_label, 0)
 
     for obj in selection:
-        targets = []
-
-        # Direct controller with shape?
-        if cmds.objectType(obj) == "transform":
-            shapes = cmds.listRelatives(obj, shapes=True, f=True) or []
-            if any(cmds.objectType(s) == "nurbsCurve" for s in shapes):
-                targets.append(obj)
-
-        # Offset group? Look inside for child with shape
-        children = cmds.listRelatives(obj, children=True, fullPath=True) or []
-        for child in children:
-            shapes = cmds.listRelatives(child, shapes=True, f=True) or []
-            if any(cmds.objectType(s) == "nurbsCurve" for s in shapes):
-                targets.append(child)
-
+        targets = find_controllers([obj])
         if not targets:
             cmds.warning("No controller found under: %s" % obj)
             continue
 
-        for ctrl in targets:
-            try:
-                cmds.setAttr(ctrl + ".rotateOrder", rotation_order)
-                cmds.warning("Set rotate order to %s on: %s" % (selected_order_label, ctrl))
-            except Exception as e:
-                cmds.warning("Failed to set rotate order on %s: %s" % (ctrl, str(e)))
+        for ctrl in set_rotate_order(targets, selected_order_label):
+            cmds.warning("Set rotate order to %s on: %s" % (selected_order_label, ctrl))
 
 def adjust_match_transform(*_):
     selection = cmds.ls(selection=True)
@@ -345,56 +1491,116 @@ def adjust_match_transform(*_):
             cmds.warning("One selected object must be a joint or locator.")
             return
 
-    # Match options
-    t_all = cmds.checkBox("matchTranslateAll", q=True, value=True)
-    t_axes = [cmds.checkBox("matchTranslate" + axis, q=True, value=True) for axis in "XYZ"]
+    match_transform_axes(source, target,
+                         translate=read_match_axes("matchTranslate"),
+                         rotate=read_match_axes("matchRotate"))
 
-    r_all = cmds.checkBox("matchRotateAll", q=True, value=True)
-    r_axes = [cmds.checkBox("matchRotate" + axis, q=True, value=True) for axis in "XYZ"]
+    cmds.warning(source + " matched transform to " + target)
 
-    # Apply transform matching
-    if t_all or any(t_axes):
-        t_values = cmds.xform(target, q=True, ws=True, t=True)
-        if not t_all:
-            s_values = cmds.xform(source, q=True, ws=True, t=True)
-            t_values = [t if a else s for t, s, a in zip(t_values, s_values, t_axes)]
-        cmds.xform(source, ws=True, t=t_values)
+def adjust_change_color(*_):
+    selection = cmds.ls(selection=True, long=True)
+    if not selection:
+        cmds.warning("Select a controller or its offset group.")
+        return
 
-    if r_all or any(r_axes):
-        r_values = cmds.xform(target, q=True, ws=True, ro=True)
-        if not r_all:
-            s_values = cmds.xform(source, q=True, ws=True, ro=True)
-            r_values = [r if a else s for r, s, a in zip(r_values, s_values, r_axes)]
-        cmds.xform(source, ws=True, ro=r_values)
+    change_color(find_controllers(selection), color_index=CURRENT_COLOR["adjust"]["index"],
+                 rgb=CURRENT_COLOR["adjust"]["rgb"])
 
-    cmds.warning(source + " matched transform to " + target)
+def adjust_side_color(*_):
+    selection = cmds.ls(selection=True, long=True)
+    if not selection:
+        cmds.warning("Select a controller or its offset group.")
+        return
 
-def adjust_change_color(*_):
+    recolored = recolor_by_side(find_controllers(selection))
+    cmds.warning("Colored %d controller(s) by side using palette: %s" % (len(recolored), ACTIVE_PALETTE[0]))
+
+def adjust_swap_shape(*_):
     selection = cmds.ls(selection=True, long=True)
     if not selection:
         cmds.warning("Select a controller or its offset group.")
         return
 
-    rgb = CURRENT_COLOR_RGB_ADJUST
+    shape = cmds.optionMenu("swapShapeMenu", q=True, value=True)
+    size = None
+    if not cmds.checkBox("swapKeepSizeCheck", q=True, value=True):
+        size = cmds.floatField("swapSizeField", q=True, value=True)
 
-    for obj in selection:
-        shape_targets = []
+    swapped = swap_controller_shapes(find_controllers(selection), shape, size=size)
+    cmds.warning("Swapped shape to %s on %d controller(s)" % (shape, len(swapped)))
+
+def load_selected_spaces(*_):
+    cmds.textField("spaceListField", e=True, text=", ".join(cmds.ls(selection=True)))
+
+def adjust_build_space_switch(*_):
+    selection = cmds.ls(selection=True, long=True)
+    if not selection:
+        cmds.warning("Select the controllers to build the space switch on.")
+        return
+
+    text = cmds.textField("spaceListField", q=True, text=True)
+    spaces = [space.strip() for space in text.split(",") if space.strip()]
+    built = create_space_switch(find_controllers(selection), spaces)
+    cmds.warning("Built space switch on %d controller(s)" % len(built))
+
+def adjust_switch_space(*_):
+    selection = cmds.ls(selection=True, long=True)
+    if not selection:
+        cmds.warning("Select a controller or its offset group.")
+        return
+
+    space = cmds.textField("switchSpaceField", q=True, text=True).strip()
+    if not space:
+        cmds.warning("Enter the space to switch to.")
+        return
+    if space.isdigit():
+        space = int(space)
+
+    start = end = None
+    if cmds.checkBox("switchRangeCheck", q=True, value=True):
+        start = cmds.playbackOptions(q=True, minTime=True)
+        end = cmds.playbackOptions(q=True, maxTime=True)
+
+    switched = switch_space(find_controllers(selection), space, start, end)
+    cmds.warning("Switched %d controller(s) to space: %s" % (len(switched), space))
+
+def adjust_retarget(*_):
+    selection = cmds.ls(selection=True, long=True)
+    if not selection or len(selection) % 2:
+        cmds.warning("Select pairs of source joint then controller.")
+        return
 
-        # Case 1: Direct curve shape on selected node
-        if cmds.objectType(obj) == "transform":
-            shapes = cmds.listRelatives(obj, shapes=True, f=True) or []
-            if any(cmds.objectType(s) == "nurbsCurve" for s in shapes):
-                shape_targets.append(obj)
+    pairs = list(zip(selection[0::2], selection[1::2]))
+    for source, ctrl in pairs:
+        if not has_curve_shape(ctrl):
+            cmds.warning("%s is not a controller, select source joint then controller." % ctrl)
+            return
 
-        # Case 2: Offset group selected — try to find child with shape
-        children = cmds.listRelatives(obj, children=True, fullPath=True) or []
-        for child in children:
-            shapes = cmds.listRelatives(child, shapes=True, f=True) or []
-            if any(cmds.objectType(s) == "nurbsCurve" for s in shapes):
-                shape_targets.append(child)
+    tolerance = None
+    if cmds.checkBox("retargetReduceCheck", q=True, value=True):
+        tolerance = cmds.floatField("retargetToleranceField", q=True, value=True)
+
+    baked = retarget_to_controllers(pairs,
+                                    cmds.playbackOptions(q=True, minTime=True),
+                                    cmds.playbackOptions(q=True, maxTime=True),
+                                    translate=read_match_axes("matchTranslate"),
+                                    rotate=read_match_axes("matchRotate"),
+                                    maintain_offset=cmds.checkBox("retargetOffsetCheck", q=True, value=True),
+                                    tolerance=tolerance)
+    cmds.warning("Baked motion onto %d controller(s)" % len(baked))
+
+def on_audit_button(*_):
+    paths = cmds.fileDialog2(fileFilter="Audit Report (*.json)", fileMode=0, caption="Save Audit Report")
+    if not paths:
+        return
+    fix = cmds.checkBox("auditFixCheck", q=True, value=True)
+    report = audit_rig(fix=fix, report_path=paths[0])
+    if report is None:
+        return
 
-        for ctrl in shape_targets:
-            color_controller(ctrl, rgb=rgb)
+    fixed = len([issue for issue in report["issues"] if issue["fixed"]])
+    cmds.warning("Audit: %d controllers, %d issues (%d fixed). Report saved to %s" %
+                 (report["controllers"], len(report["issues"]), fixed, paths[0]))
 
 # -----------------------------------------------------------------------------------------------------------------#
 #                                            ~ UI Styling ~                                                        #
@@ -457,6 +1663,16 @@ def format_button_row(buttons):
         cmds.button(label=label, w=80, h=25, command=cmd)
     cmds.setParent('..')
 
+def preset_button_row(tab):
+    cmds.columnLayout(tab + "PresetRow", adjustableColumn=True)
+    format_button_row(preset_buttons(tab))
+    cmds.setParent("..")
+
+def preset_buttons(tab):
+    def select(label):
+        return lambda *_: select_preset_color(label, tab)
+    return [(label, select(label)) for label in sorted(COLOR_PRESETS)]
+
 def separator(index=0):
     styles = [
         {'h': 10, 'style': 'in'},  # Default: visible separator line
@@ -593,15 +1809,18 @@ def create_ui():
     # Section: Color
     cmds.frameLayout(label="Choose Color", collapsable=True, collapse=False, marginHeight=6, marginWidth=6)
     cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
-    format_button_row([
-        ("Blue", lambda *_: select_preset_color("Blue", "create")),
-        ("Red", lambda *_: select_preset_color("Red", "create")),
-        ("Yellow", lambda *_: select_preset_color("Yellow", "create"))
-    ])
+    cmds.rowLayout(nc=2, adjustableColumn=1)
+    format_option_menu("Palette", "paletteMenu", sorted(PALETTES.keys()))
+    cmds.button(label="Load...", w=60, command=on_load_palette)
+    cmds.setParent("..")
+    cmds.optionMenu("paletteMenu", e=True, value=ACTIVE_PALETTE[0], cc=on_palette_changed)
+
+    preset_button_row("create")
 
     cmds.rowLayout(nc=1, adjustableColumn=2, columnWidth1=250, columnAlign=(1, 'center'), columnAttach=[(1, 'both', 40)])
-    cmds.button("colorPreviewCreate", label="", bgc=CURRENT_COLOR_RGB_CREATE, h=25, w=250, command=lambda *_: open_color_picker("create"))
+    cmds.button("colorPreviewCreate", label="", bgc=CURRENT_COLOR["create"]["rgb"], h=25, w=250, command=lambda *_: open_color_picker("create"))
     cmds.setParent("..")
+    cmds.checkBox("autoSideColorCheck", label="Color by side (L/R/C from name)", value=False)
     cmds.setParent("..")
     cmds.setParent("..")
 
@@ -747,18 +1966,70 @@ def create_ui():
     # Section: Choose Color
     cmds.frameLayout(label="Choose Color", collapsable=True, collapse=False, marginHeight=6, marginWidth=6)
     cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
-    format_button_row([
-        ("Blue", lambda *_: select_preset_color("Blue", "adjust")),
-        ("Red", lambda *_: select_preset_color("Red", "adjust")),
-        ("Yellow", lambda *_: select_preset_color("Yellow", "adjust"))
-    ])
+    preset_button_row("adjust")
 
     cmds.rowLayout(nc=1, adjustableColumn=2, columnWidth1=250, columnAlign=(1, 'center'), columnAttach=[(1, 'both', 40)])
-    cmds.button("colorPreviewAdjust", label="", bgc=CURRENT_COLOR_RGB_ADJUST, h=25, w=250, command=lambda *_: open_color_picker("adjust"))
+    cmds.button("colorPreviewAdjust", label="", bgc=CURRENT_COLOR["adjust"]["rgb"], h=25, w=250, command=lambda *_: open_color_picker("adjust"))
     cmds.setParent("..")
     separator(1)
     cmds.button("adjustColorButton", label="Change Color", h=30, bgc=(0.5, 0.5, 0.5), command=adjust_change_color, ann="Select a controller or offset group")
+    cmds.button(label="Color by Side", h=30, bgc=(0.5, 0.5, 0.5), command=adjust_side_color,
+                ann="Apply the active palette's L/R/C colors based on controller names")
+
+    cmds.setParent('..')  # columnLayout
+    cmds.setParent('..')  # frameLayout
+
+    # Section: Swap Shape
+    cmds.frameLayout(label="Swap Shape", collapsable=True, collapse=False, marginHeight=6, marginWidth=6)
+    cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
+    format_option_menu("Shape", "swapShapeMenu", sorted(SHAPE_CREATORS.keys()))
+    cmds.checkBox("swapKeepSizeCheck", label="Keep current size", value=True,
+                  cc=lambda value: cmds.floatField("swapSizeField", e=True, enable=not value))
+    format_layout("Size", cmds.floatField, "swapSizeField", value=1.0, enable=False)
+    cmds.button(label="Swap Shape", h=30, bgc=(0.5, 0.5, 0.5), command=adjust_swap_shape,
+                ann="Replace the curve shapes of the selected controllers, keeping transforms and animation")
+    cmds.setParent('..')  # columnLayout
+    cmds.setParent('..')  # frameLayout
+
+    # Section: Space Switching
+    cmds.frameLayout(label="Space Switching", collapsable=True, collapse=True, marginHeight=6, marginWidth=6)
+    cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
+    cmds.rowLayout(nc=2, adjustableColumn=1)
+    format_layout("Spaces", cmds.textField, "spaceListField", text="world",
+                  ann="Comma separated space nodes, 'world' for the scene root")
+    cmds.button(label="Load Selected", w=90, command=load_selected_spaces)
+    cmds.setParent("..")
+    cmds.button(label="Build Space Switch", h=30, bgc=(0.5, 0.5, 0.5), command=adjust_build_space_switch,
+                ann="Constrain the offset groups of the selected controllers to the spaces")
+    separator(0)
+    format_layout("Switch to", cmds.textField, "switchSpaceField", text="")
+    cmds.checkBox("switchRangeCheck", label="Keep pose over playback range", value=False)
+    cmds.button(label="Switch Space", h=30, bgc=(0.5, 0.5, 0.5), command=adjust_switch_space,
+                ann="Change space on the selected controllers without moving them in world space")
+    cmds.setParent('..')  # columnLayout
+    cmds.setParent('..')  # frameLayout
+
+    # Section: Motion Capture Retarget
+    cmds.frameLayout(label="Motion Capture Retarget", collapsable=True, collapse=True, marginHeight=6, marginWidth=6)
+    cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
+    cmds.text(label="Uses the Match Options axes. Select source joint then controller, in pairs", align="left")
+    cmds.checkBox("retargetOffsetCheck", label="Maintain offset from first frame", value=False)
+    cmds.rowLayout(nc=2)
+    cmds.checkBox("retargetReduceCheck", label="Reduce keys, tolerance", value=False,
+                  cc=lambda value: cmds.floatField("retargetToleranceField", e=True, enable=value))
+    cmds.floatField("retargetToleranceField", value=0.01, precision=3, enable=False, w=60)
+    cmds.setParent("..")
+    cmds.button(label="Bake Retarget", h=30, bgc=(0.5, 0.5, 0.5), command=adjust_retarget,
+                ann="Bake the source joints onto the controllers over the playback range")
+    cmds.setParent('..')  # columnLayout
+    cmds.setParent('..')  # frameLayout
 
+    # Section: Rig Audit
+    cmds.frameLayout(label="Rig Audit", collapsable=True, collapse=True, marginHeight=6, marginWidth=6)
+    cmds.columnLayout(adjustableColumn=True, rowSpacing=4)
+    cmds.checkBox("auditFixCheck", label="Auto-fix offset locking and side colors", value=False)
+    cmds.button(label="Audit Rig", h=30, bgc=(0.5, 0.5, 0.5), command=on_audit_button,
+                ann="Check every controller in the scene against the audit rules")
     cmds.setParent('..')  # columnLayout
     cmds.setParent('..')  # frameLayout
     cmds.setParent('..')  # adjust_layout
@@ -0,0 +1,249 @@
+import argparse
+import json
+import multiprocessing
+import multiprocessing.connection
+import time
+import traceback
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                            ~ Scene Backends ~                                                    #
+# -----------------------------------------------------------------------------------------------------------------#
+# A backend opens, modifies and saves one scene at a time inside a worker process. The driver below only
+# talks to this interface, so any object with the same four methods (e.g. a stub that records calls)
+# can stand in for Maya.
+
+class MayaBatchBackend(object):
+    def initialize(self):
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+
+        import maya.cmds as cmds
+        import CTRLonDemand
+        self.cmds = cmds
+        self.tool = CTRLonDemand
+
+    def open_file(self, path):
+        self.cmds.file(path, open=True, force=True)
+
+    def apply(self, operation, options):
+        return self.tool.run_batch_operation(operation, options)
+
+    def save_file(self, path):
+        self.cmds.file(save=True, force=True)
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                              ~ Workers ~                                                         #
+# -----------------------------------------------------------------------------------------------------------------#
+WORKER_BACKEND = [None]
+WORKER_ERROR = [None]
+
+def init_worker(backend_factory):
+    # Keep a start-up error and fail each file with it instead of losing the worker
+    try:
+        backend = backend_factory()
+        backend.initialize()
+        WORKER_BACKEND[0] = backend
+    except Exception as e:
+        WORKER_ERROR[0] = ("Backend failed to start: %s" % e, traceback.format_exc())
+
+def failed_record(path, error, trace="", seconds=0.0):
+    return {
+        "file": path,
+        "status": "failed",
+        "error": error,
+        "traceback": trace,
+        "seconds": seconds,
+    }
+
+def process_file(job):
+    path, operation, options, save = job
+    backend = WORKER_BACKEND[0]
+    start = time.time()
+    if backend is None:
+        error, trace = WORKER_ERROR[0] or ("Backend was not initialized", "")
+        return failed_record(path, error, trace)
+    try:
+        backend.open_file(path)
+        result = backend.apply(operation, options)
+        if save:
+            backend.save_file(path)
+        return {
+            "file": path,
+            "status": "ok",
+            "result": result,
+            "seconds": round(time.time() - start, 3),
+        }
+    except Exception as e:
+        return failed_record(path, str(e), traceback.format_exc(), round(time.time() - start, 3))
+
+def worker_loop(conn, backend_factory):
+    init_worker(backend_factory)
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        conn.send(process_file(job))
+
+class BatchWorker(object):
+    # One worker process fed a single job at a time over a pipe, so a crash or hang can be pinned on its file
+    def __init__(self, context, backend_factory):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_loop, args=(child_conn, backend_factory))
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        self.job = None
+        self.started = None
+        self.processed = 0
+
+    def submit(self, job):
+        self.job = job
+        self.started = time.time()
+        try:
+            self.conn.send(job)
+        except (OSError, EOFError):
+            pass    # The process is already gone, collect() reports it
+
+    def collect(self, file_timeout=None):
+        path = self.job[0]
+        seconds = round(time.time() - self.started, 3)
+        if self.conn.poll():
+            try:
+                return self.conn.recv()
+            except (OSError, EOFError):
+                pass
+        if not self.process.is_alive():
+            self.process.join()
+            return failed_record(path, "Worker exited with code %s while processing the scene"
+                                 % self.process.exitcode, seconds=seconds)
+        if file_timeout and seconds > file_timeout:
+            self.process.terminate()
+            self.process.join()
+            return failed_record(path, "Timed out after %s seconds" % file_timeout, seconds=seconds)
+        return None
+
+    def stop(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (OSError, EOFError):
+                pass
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.conn.close()
+
+# -----------------------------------------------------------------------------------------------------------------#
+#                                               ~ Driver ~                                                         #
+# -----------------------------------------------------------------------------------------------------------------#
+def read_file_list(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def run_workers(jobs, workers, backend_factory, record, files_per_worker=None, file_timeout=None,
+                python_executable=None):
+    # Spawned workers each boot their own backend; inside the Maya GUI point python_executable at mayapy
+    context = multiprocessing.get_context("spawn")
+    if python_executable:
+        context.set_executable(python_executable)
+
+    pending = list(reversed(jobs))
+    pool = []
+    try:
+        while True:
+            for worker in pool:
+                if worker.job is None and pending:
+                    worker.submit(pending.pop())
+            while len(pool) < workers and pending:
+                worker = BatchWorker(context, backend_factory)
+                worker.submit(pending.pop())
+                pool.append(worker)
+
+            busy = [worker for worker in pool if worker.job is not None]
+            if not busy:
+                break
+
+            wait_time = None
+            if file_timeout:
+                now = time.time()
+                wait_time = max(0.0, min(worker.started + file_timeout - now for worker in busy))
+            multiprocessing.connection.wait([worker.conn for worker in busy] +
+                                            [worker.process.sentinel for worker in busy], wait_time)
+
+            for worker in busy:
+                result = worker.collect(file_timeout)
+                if result is None:
+                    continue
+                record(result)
+                worker.job = None
+                worker.processed += 1
+                # Replace crashed, timed-out and recycled workers with a fresh process
+                if not worker.process.is_alive() or (files_per_worker and worker.processed >= files_per_worker):
+                    worker.stop()
+                    pool.remove(worker)
+    finally:
+        for worker in pool:
+            if worker.job is not None:
+                worker.process.terminate()
+            worker.stop()
+
+def batch_apply(files, operation, options=None, workers=4, log_path=None, backend_factory=MayaBatchBackend,
+                save=True, files_per_worker=None, file_timeout=None, python_executable=None):
+    jobs = [(path, operation, options or {}, save) for path in files]
+    results = []
+    log = open(log_path, "a") if log_path else None
+
+    def record(result):
+        results.append(result)
+        if log:
+            log.write(json.dumps(result) + "\n")
+            log.flush()
+
+    try:
+        if workers <= 1:
+            init_worker(backend_factory)
+            for job in jobs:
+                record(process_file(job))
+        else:
+            run_workers(jobs, workers, backend_factory, record, files_per_worker=files_per_worker,
+                        file_timeout=file_timeout, python_executable=python_executable)
+    finally:
+        if log:
+            log.close()
+
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a CTRLonDemand operation to many scenes.")
+    parser.add_argument("files", nargs="*", help="Scene files to process")
+    parser.add_argument("--file-list", help="Text file with one scene path per line")
+    parser.add_argument("--operation", required=True,
+                        help="lock_channels, rotate_order, change_color, side_color, swap_shape, "
+                             "match_transform or apply_spec")
+    parser.add_argument("--options", default="{}", help="Operation options as a JSON string")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--files-per-worker", type=int, default=None,
+                        help="Restart a worker after this many scenes")
+    parser.add_argument("--file-timeout", type=float, default=None,
+                        help="Fail a scene and restart its worker after this many seconds")
+    parser.add_argument("--log", default=None, help="JSON-lines log of per-file results")
+    parser.add_argument("--no-save", action="store_true", help="Open and modify scenes without saving")
+    args = parser.parse_args(argv)
+
+    files = list(args.files)
+    if args.file_list:
+        files.extend(read_file_list(args.file_list))
+
+    results = batch_apply(files, args.operation, json.loads(args.options), workers=args.workers,
+                          log_path=args.log, save=not args.no_save, files_per_worker=args.files_per_worker,
+                          file_timeout=args.file_timeout)
+
+    failed = [result for result in results if result["status"] != "ok"]
+    for result in failed:
+        print("FAILED %s: %s" % (result["file"], result["error"]))
+    print("%d scenes processed, %d failed" % (len(results), len(failed)))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import CTRLonDemandBatch
+
+
+class StubBackend(object):
+    def initialize(self):
+        self.saved = []
+
+    def open_file(self, path):
+        if "bad_open" in path:
+            raise IOError("Cannot open %s" % path)
+        if "crash" in path:
+            os._exit(3)
+        self.path = path
+
+    def apply(self, operation, options):
+        if "bad_apply" in self.path:
+            raise ValueError("Operation failed")
+        return [operation, self.path, options.get("value")]
+
+    def save_file(self, path):
+        self.saved.append(path)
+
+
+class BrokenBackend(StubBackend):
+    def initialize(self):
+        raise RuntimeError("No license")
+
+
+class BatchApplyTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.temp_dir, "batch.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_batch(self, files, workers=1, backend_factory=StubBackend):
+        results = CTRLonDemandBatch.batch_apply(files, "side_color", {"value": 1}, workers=workers,
+                                                log_path=self.log_path, backend_factory=backend_factory)
+        return dict((result["file"], result) for result in results)
+
+    def test_ok_path(self):
+        for workers in (1, 2):
+            results = self.run_batch(["a.ma", "b.ma", "c.ma"], workers=workers)
+            self.assertEqual(sorted(results), ["a.ma", "b.ma", "c.ma"])
+            for path, result in results.items():
+                self.assertEqual(result["status"], "ok")
+                self.assertEqual(result["result"], ["side_color", path, 1])
+
+    def test_open_and_apply_errors(self):
+        for workers in (1, 2):
+            results = self.run_batch(["bad_open.ma", "bad_apply.ma", "good.ma"], workers=workers)
+            self.assertEqual(results["bad_open.ma"]["status"], "failed")
+            self.assertIn("Cannot open", results["bad_open.ma"]["error"])
+            self.assertEqual(results["bad_apply.ma"]["status"], "failed")
+            self.assertIn("ValueError", results["bad_apply.ma"]["traceback"])
+            self.assertEqual(results["good.ma"]["status"], "ok")
+
+    def test_initializer_failure(self):
+        results = self.run_batch(["a.ma", "b.ma", "c.ma"], workers=2, backend_factory=BrokenBackend)
+        self.assertEqual(len(results), 3)
+        for result in results.values():
+            self.assertEqual(result["status"], "failed")
+            self.assertIn("No license", result["error"])
+
+    def test_worker_crash(self):
+        results = self.run_batch(["a.ma", "crash.ma", "b.ma", "c.ma"], workers=2)
+        self.assertEqual(results["crash.ma"]["status"], "failed")
+        self.assertIn("exited with code 3", results["crash.ma"]["error"])
+        for path in ("a.ma", "b.ma", "c.ma"):
+            self.assertEqual(results[path]["status"], "ok")
+
+    def test_log_contents(self):
+        self.run_batch(["a.ma", "bad_apply.ma"], workers=2)
+        with open(self.log_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(sorted(record["file"] for record in records), ["a.ma", "bad_apply.ma"])
+        for record in records:
+            self.assertIn("seconds", record)
+            if record["file"] == "a.ma":
+                self.assertEqual(record["status"], "ok")
+                self.assertEqual(record["result"], ["side_color", "a.ma", 1])
+            else:
+                self.assertEqual(record["status"], "failed")
+                self.assertEqual(record["error"], "Operation failed")
+
+
+if __name__ == "__main__":
+    unittest.main()